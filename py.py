@@ -3,11 +3,11 @@ import json
 import importlib.util
 import sys
 import asyncio
+import atexit
+import queue
 import threading
-import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import customtkinter
-from tkinter import filedialog, messagebox, scrolledtext
 import subprocess
 import logging
 import random
@@ -17,77 +17,192 @@ import shutil
 import shlex
 import time
 import hashlib
-from functools import wraps
+import heapq
+import hmac
+import base64
+from functools import lru_cache, wraps
+from operator import itemgetter
+from collections import OrderedDict, deque, namedtuple
 from typing import Callable, Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # ------------- Audit / logging -------------
 logging.basicConfig(filename='sudo_audit.log', level=logging.INFO,
                     format='%(asctime)s %(levelname)s %(message)s')
 
 # ------------- Utilidades -------------
-def hash_password(plain: str, salt: Optional[str] = None) -> str:
+# custo do scrypt; fica gravado no hash, então pode subir sem migração
+SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# pepper do processo: só serve para chavear o cache de verificações
+_PEPPER = os.urandom(32)
+
+def _scrypt(plain: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(plain.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r, dklen=32)
+
+def hash_password(plain: str, salt: Optional[bytes] = None) -> str:
+    # salt e hash ficam em bytes; base64 só na serialização
     if salt is None:
-        salt = os.urandom(16).hex()
-    h = hashlib.sha256((plain + salt).encode('utf-8')).hexdigest()
-    return f"{salt}${h}"
+        salt = os.urandom(16)
+    h = _scrypt(plain, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return (f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$"
+            f"{base64.b64encode(salt).decode('ascii')}${base64.b64encode(h).decode('ascii')}")
+
+def verify_password(plain: str, stored: str) -> bool:
+    parts = stored.split('$')
+    if parts[0] == 'scrypt':
+        _, n, r, p, salt, hashed = parts
+        candidate = _scrypt(plain, base64.b64decode(salt), int(n), int(r), int(p))
+        expected = base64.b64decode(hashed)
+    else:
+        # formato antigo: salt$sha256(plain+salt), salt usado como texto
+        salt, hashed = parts
+        candidate = hashlib.sha256(plain.encode('utf-8') + salt.encode('utf-8')).digest()
+        expected = bytes.fromhex(hashed)
+    return hmac.compare_digest(candidate, expected)
+
+# ids de permissão: cada perm vira um bit; '*' é o bit 0
+WILDCARD_BIT = 1
+_PERM_IDS: Dict[str, int] = {'*': WILDCARD_BIT}
+_perm_ids_lock = threading.Lock()
+
+def _perm_bit(perm: str) -> int:
+    bit = _PERM_IDS.get(perm)
+    if bit is None:
+        with _perm_ids_lock:
+            bit = _PERM_IDS.setdefault(perm, 1 << len(_PERM_IDS))
+    return bit
 
 # ------------- Armazenamento de usuários (simples) -------------
 class UserStore:
-    def __init__(self, path='users.json'):
+    def __init__(self, path='users.json', flush_delay: float = 0.05):
         self.path = path
         self._load()
+        # escrita em lote: mutações marcam dirty e um timer grava depois
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        self.flush_delay = flush_delay
+        atexit.register(self.flush)
+        # cache LRU de verificações: (username, blake2b(plain)) -> bool
+        self._verified = OrderedDict()
+        self._verified_max = 512
 
     def _load(self):
         try:
-            with open(self.path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson else json.loads(raw)
         except Exception:
             data = {}
         # formato: username -> {"perms": [...], "password": hashed or None}
         self.users: Dict[str, Dict[str, Any]] = data
+        self._users_tuple = None
+        for u in self.users.values():
+            self._index(u)
+
+    def _index(self, u: Dict[str, Any]):
+        # máscara de bits das perms para has_perm (não é serializada)
+        mask = 0
+        for perm in u.get('perms', []):
+            mask |= _perm_bit(perm)
+        u['_mask'] = mask
 
     def save(self):
-        with open(self.path, 'w', encoding='utf-8') as f:
-            json.dump(self.users, f, indent=2)
+        with self._lock:
+            data = {name: {k: v for k, v in u.items() if not k.startswith('_')}
+                    for name, u in self.users.items()}
+            if orjson:
+                raw = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+            else:
+                raw = json.dumps(data, indent=2, sort_keys=True).encode('utf-8')
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(raw)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def _mark_dirty(self):
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Grava users.json se houver mudanças pendentes"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self.save()
 
     def ensure_user(self, username: str):
-        if username not in self.users:
-            self.users[username] = {"perms": [], "password": None}
-            self.save()
+        with self._lock:
+            if username not in self.users:
+                self.users[username] = {"perms": [], "password": None}
+                self._index(self.users[username])
+                self._users_tuple = None
+                self._mark_dirty()
 
     def set_password(self, username: str, plain: str):
-        self.ensure_user(username)
-        self.users[username]['password'] = hash_password(plain)
-        self.save()
+        hashed = hash_password(plain)
+        with self._lock:
+            self.ensure_user(username)
+            self.users[username]['password'] = hashed
+            self._verified.clear()
+            self._mark_dirty()
 
     def check_password(self, username: str, plain: str) -> bool:
+        key = (username, hashlib.blake2b(plain.encode('utf-8'), key=_PEPPER, digest_size=16).hexdigest())
+        ok = self._verified.get(key)
+        if ok is not None:
+            self._verified.move_to_end(key)
+            return ok
         u = self.users.get(username)
         if not u: return False
         hp = u.get('password')
         if hp is None: return False
-        salt, hashed = hp.split('$')
-        return hash_password(plain, salt) == hp
+        ok = verify_password(plain, hp)
+        self._verified[key] = ok
+        if len(self._verified) > self._verified_max:
+            self._verified.popitem(last=False)
+        return ok
 
     def add_perm(self, username: str, perm: str):
-        self.ensure_user(username)
-        if perm not in self.users[username]['perms']:
-            self.users[username]['perms'].append(perm)
-            self.save()
+        with self._lock:
+            self.ensure_user(username)
+            if perm not in self.users[username]['perms']:
+                self.users[username]['perms'].append(perm)
+                self._index(self.users[username])
+                self._mark_dirty()
 
     def remove_perm(self, username: str, perm: str):
-        self.ensure_user(username)
-        if perm in self.users[username]['perms']:
-            self.users[username]['perms'].remove(perm)
-            self.save()
+        with self._lock:
+            self.ensure_user(username)
+            if perm in self.users[username]['perms']:
+                self.users[username]['perms'].remove(perm)
+                self._index(self.users[username])
+                self._mark_dirty()
 
     def has_perm(self, username: str, perm: str) -> bool:
         u = self.users.get(username)
         if not u: return False
-        perms = set(u.get('perms', []))
-        return '*' in perms or perm in perms
+        return bool(u['_mask'] & (WILDCARD_BIT | _PERM_IDS.get(perm, 0)))
 
     def list_users(self):
-        return list(self.users.keys())
+        if self._users_tuple is None:
+            self._users_tuple = tuple(self.users)
+        return self._users_tuple
 
     def list_perms(self, username: str):
         u = self.users.get(username)
@@ -99,18 +214,24 @@ class Context:
     def __init__(self, user: str):
         self.user = user
 
+Cmd = namedtuple('Cmd', 'fn perm')
+
 class CommandRegistry:
     def __init__(self):
-        self._cmds: Dict[str, Dict[str, Any]] = {}
+        self._cmds: Dict[str, Cmd] = {}
+        self._cmd_tuple = ()
 
     def register(self, name: str, fn: Callable, perm: Optional[str] = None):
-        self._cmds[name] = {'fn': fn, 'perm': perm}
+        if perm:
+            _perm_bit(perm)
+        self._cmds[name] = Cmd(fn, perm)
+        self._cmd_tuple = tuple(self._cmds)
 
     def get(self, name: str):
         return self._cmds.get(name)
 
     def all_commands(self):
-        return list(self._cmds.keys())
+        return self._cmd_tuple
 
 registry = CommandRegistry()
 
@@ -123,94 +244,135 @@ def command(name: str, required_perm: Optional[str] = None):
     return deco
 
 # ------------- Dispatcher with sudo & impersonation -------------
+_QUOTE_RE = re.compile(r'[\'"\\]')
+
+_ctx_tls = threading.local()
+
+@lru_cache(maxsize=256)
+def _tokenize(line: str) -> tuple:
+    # shlex só quando há aspas ou escapes; o caso comum é um split simples
+    if _QUOTE_RE.search(line):
+        return tuple(shlex.split(line))
+    return tuple(line.split())
+
 class Dispatcher:
     def __init__(self, user_store: UserStore):
         self.users = user_store
         # impersonation sessions: username -> (target_user, expires_at)
         self.sessions: Dict[str, tuple] = {}
+        # min-heap de (expires_at, invoker) para expirar sessões sem varrer o dict
+        self._session_heap: list = []
 
     def _log(self, level, msg):
         getattr(logging, level)(msg)
 
-    def _execute_as(self, target_user: str, cmdline: str, invoker: str):
-        parts = shlex.split(cmdline)
+    def _reap(self, now: float):
+        heap = self._session_heap
+        while heap and heap[0][0] <= now:
+            expires, invoker = heapq.heappop(heap)
+            sess = self.sessions.get(invoker)
+            # entradas antigas de uma sessão renovada são só descartadas
+            if sess and sess[1] == expires:
+                del self.sessions[invoker]
+                logging.info(f"SUDO_SESSION_END: invoker={invoker}")
+
+    def _execute_as(self, target_user: str, parts: tuple, invoker: str):
         if not parts:
             return "no command"
         name, *args = parts
         entry = registry.get(name)
         if not entry:
             return f"unknown command '{name}'"
-        required = entry['perm']
+        required = entry.perm
         if required and not self.users.has_perm(target_user, required):
             return f"user '{target_user}' lacks '{required}' permission"
-        ctx = Context(target_user)
+        # Context reaproveitado por thread; comandos não guardam o ctx
+        ctx = getattr(_ctx_tls, 'ctx', None)
+        if ctx is None:
+            ctx = _ctx_tls.ctx = Context(target_user)
+        prev_user, ctx.user = ctx.user, target_user
         try:
-            result = entry['fn'](ctx, *args)
-            self._log('info', f"EXECUTE: invoker={invoker} as={target_user} cmd='{cmdline}' -> OK")
+            result = entry.fn(ctx, *args)
+            self._log('info', f"EXECUTE: invoker={invoker} as={target_user} cmd='{' '.join(parts)}' -> OK")
             return result
         except Exception as e:
-            self._log('exception', f"EXECUTE FAILED: invoker={invoker} as={target_user} cmd='{cmdline}'")
+            self._log('exception', f"EXECUTE FAILED: invoker={invoker} as={target_user} cmd='{' '.join(parts)}'")
             return f"error: {e}"
+        finally:
+            ctx.user = prev_user
+
+    def _sudo_as(self, invoker: str, parts: tuple):
+        # sudo format: sudo -u <target> <command...>
+        if len(parts) < 3:
+            return None
+        target = parts[2]
+        if len(parts) < 4:
+            return "usage: sudo -u <target> <command...>"
+        command = ' '.join(parts[3:])
+        if not self.users.has_perm(invoker, 'sudo'):
+            return f"invoker '{invoker}' lacks 'sudo' permission"
+        logging.info(f"SUDO: {invoker} -> {target}: {command}")
+        return self._execute_as(target, parts[3:], invoker)
+
+    def _sudo_session(self, invoker: str, parts: tuple):
+        # sudo to start an impersonation session: sudo -i -u <target> <seconds?>
+        if len(parts) < 4 or parts[2] != '-u':
+            return None
+        target = parts[3]
+        ttl = 300  # default 5 minutos
+        if len(parts) >= 5:
+            try:
+                ttl = int(parts[4])
+            except Exception:
+                pass
+        if not self.users.has_perm(invoker, 'sudo'):
+            return f"invoker '{invoker}' lacks 'sudo' permission"
+        expires = time.time() + ttl
+        self.sessions[invoker] = (target, expires)
+        heapq.heappush(self._session_heap, (expires, invoker))
+        logging.info(f"SUDO_SESSION_START: {invoker} -> {target} for {ttl}s")
+        return f"impersonating {target} for {ttl} seconds"
+
+    # primeira flag depois de 'sudo' -> handler
+    _SUDO_HANDLERS = {'-u': _sudo_as, '-i': _sudo_session}
 
     def run(self, invoker: str, cmdline: str):
-        parts = shlex.split(cmdline)
+        parts = _tokenize(cmdline)
         if not parts:
             return "no command"
 
-        # caso: comando 'sudo -u target <command...>'
+        # caso: comando 'sudo ...'
         if parts[0] == 'sudo':
-            # sudo format: sudo -u <target> <command...>
-            if len(parts) >= 3 and parts[1] == '-u':
-                target = parts[2]
-                if len(parts) < 4:
-                    return "usage: sudo -u <target> <command...>"
-                command = ' '.join(parts[3:])
-                if not self.users.has_perm(invoker, 'sudo'):
-                    return f"invoker '{invoker}' lacks 'sudo' permission"
-                logging.info(f"SUDO: {invoker} -> {target}: {command}")
-                return self._execute_as(target, command, invoker)
-
-            # sudo to start an impersonation session: sudo -i -u <target> <seconds?>
-            if len(parts) >= 4 and parts[1] == '-i' and parts[2] == '-u':
-                target = parts[3]
-                ttl = 300  # default 5 minutos
-                if len(parts) >= 5:
-                    try:
-                        ttl = int(parts[4])
-                    except Exception:
-                        pass
-                if not self.users.has_perm(invoker, 'sudo'):
-                    return f"invoker '{invoker}' lacks 'sudo' permission"
-                expires = time.time() + ttl
-                self.sessions[invoker] = (target, expires)
-                logging.info(f"SUDO_SESSION_START: {invoker} -> {target} for {ttl}s")
-                return f"impersonating {target} for {ttl} seconds"
-
+            handler = self._SUDO_HANDLERS.get(parts[1]) if len(parts) > 1 else None
+            result = handler(self, invoker, parts) if handler else None
+            if result is not None:
+                return result
             return "usage: sudo -u <target> <command...>  OR  sudo -i -u <target> [seconds]"
 
         # caso: se invoker tem sessão ativa, executa como target até expirar
+        self._reap(time.time())
         sess = self.sessions.get(invoker)
         if sess:
-            target, expires = sess
-            if time.time() < expires:
-                # execute as target
-                logging.info(f"SUDO_SESSION_EXEC: invoker={invoker} active_as={target} cmd='{cmdline}'")
-                return self._execute_as(target, cmdline, invoker)
-            else:
-                del self.sessions[invoker]
-                logging.info(f"SUDO_SESSION_END: invoker={invoker}")
+            target = sess[0]
+            logging.info(f"SUDO_SESSION_EXEC: invoker={invoker} active_as={target} cmd='{cmdline}'")
+            return self._execute_as(target, parts, invoker)
 
         # exec normal como invoker
         logging.info(f"CMD: {invoker}: {cmdline}")
-        return self._execute_as(invoker, cmdline, invoker)
+        return self._execute_as(invoker, parts, invoker)
 
 # ------------- Comandos de administração de exemplo -------------
-@command('grant', required_perm='grant')
+@lru_cache(maxsize=32)
+def _joined(names: tuple) -> str:
+    # as listagens só mudam quando a tupla em cache é refeita
+    return ', '.join(names)
+
+@command('grant', required_perm='admin')
 def cmd_grant(ctx: Context, who: str, perm: str):
     dispatcher.users.add_perm(who, perm)
     return f"{ctx.user} granted '{perm}' to {who}"
 
-@command('revoke', required_perm='grant')
+@command('revoke', required_perm='admin')
 def cmd_revoke(ctx: Context, who: str, perm: str):
     dispatcher.users.remove_perm(who, perm)
     return f"{ctx.user} revoked '{perm}' from {who}"
@@ -229,7 +391,7 @@ def cmd_echo(ctx: Context, *words):
 
 @command('list_users', required_perm='admin')
 def cmd_list_users(ctx: Context):
-    return ', '.join(dispatcher.users.list_users())
+    return _joined(dispatcher.users.list_users())
 
 @command('list_perms', required_perm='admin')
 def cmd_list_perms(ctx: Context, who: str):
@@ -259,7 +421,7 @@ def cmd_remove_perm(ctx: Context, who: str, perm: str):
 
 @command('list_commands')
 def cmd_list_commands(ctx: Context):
-    return ', '.join(registry.all_commands())
+    return _joined(registry.all_commands())
 
 # ------------- BootSystem and other classes follow... -------------
 
@@ -303,6 +465,15 @@ class BootSystem:
         
         self.boot_log = []
         self.boot_success = False
+        # log em buffer: um handle aberto só uma vez e registros de logging em lote
+        self._log_fh = None
+        self._pending_log = deque(maxlen=256)
+        atexit.register(self.flush_log)
+        # (mtime do boot_config, itens ordenados) da última execução
+        self._sorted_cache = None
+        # prefixo "YYYY-mm-dd HH:MM:SS" do último segundo formatado
+        self._ts_sec = None
+        self._ts_prefix = ""
         
     def ensure_boot_files(self):
         """Create boot files if they don't exist with improved defaults"""
@@ -322,17 +493,38 @@ class BootSystem:
     
     def log_boot(self, message, level="INFO"):
         """Log boot message with levels"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        ns = time.time_ns()
+        sec = ns // 1_000_000_000
+        if sec != self._ts_sec:
+            self._ts_sec = sec
+            self._ts_prefix = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        timestamp = f"{self._ts_prefix}.{(ns // 1_000_000) % 1000:03d}"
         log_entry = f"[{timestamp}] [{level}] {message}"
         self.boot_log.append(log_entry)
         
+        if len(self._pending_log) == self._pending_log.maxlen:
+            self.flush_log()
+        self._pending_log.append((getattr(logging, level), message))
+        
         try:
-            with open(self.boot_console_file, 'a') as f:
-                f.write(log_entry + "\n")
-            logging.log(getattr(logging, level), message)
-        except:
+            if self._log_fh is None:
+                self._log_fh = open(self.boot_console_file, 'a', encoding='utf-8', buffering=1 << 16)
+            self._log_fh.write(log_entry + "\n")
+        except OSError:
             pass
     
+    def flush_log(self):
+        """Flush buffered boot log lines and emit pending records as one"""
+        if self._pending_log:
+            level = max(lvl for lvl, _ in self._pending_log)
+            logging.log(level, "\n".join(msg for _, msg in self._pending_log))
+            self._pending_log.clear()
+        if self._log_fh is not None:
+            try:
+                self._log_fh.flush()
+            except OSError:
+                pass
+    
     def load_boot_config(self):
         """Load boot configuration with validation"""
         try:
@@ -348,6 +540,64 @@ class BootSystem:
             self.log_boot("⚠ Falling back to enhanced default sequence", "WARNING")
             return self.default_boot_sequence
     
+    def _sorted_sequence(self, sequence):
+        """Sequence items by priority, cached while boot_config is unchanged"""
+        try:
+            mtime = os.stat(self.boot_config_file).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._sorted_cache is not None and self._sorted_cache[0] == mtime:
+            return self._sorted_cache[1]
+        
+        decorated = [(item.get("priority", 999), name, item) for name, item in sequence.items()]
+        decorated.sort(key=itemgetter(0))
+        sorted_items = [(name, item) for _, name, item in decorated]
+        self._sorted_cache = (mtime, sorted_items)
+        return sorted_items
+    
+    def _full_path(self, path):
+        return os.path.join(self.root_dir, path) if not os.path.isabs(path) else path
+    
+    # Windows e macOS resolvem nomes sem diferenciar maiúsculas
+    _CASE_INSENSITIVE_FS = os.name == "nt" or sys.platform == "darwin"
+    
+    @staticmethod
+    def _list_dir(parent):
+        # symlink quebrado aparece na listagem, mas os.path.exists daria False
+        try:
+            with os.scandir(parent) as it:
+                return {e.name for e in it if not e.is_symlink() or os.path.exists(e.path)}
+        except OSError:
+            return set()
+    
+    def _existing_paths(self, full_paths):
+        """Return which of full_paths exist, listing each parent dir only once"""
+        existing = set()
+        buckets = {}
+        fallback = []
+        for full_path in full_paths:
+            parent, base = os.path.split(full_path)
+            if base in ("", ".", ".."):
+                fallback.append(full_path)
+            else:
+                buckets.setdefault(parent, []).append((base, full_path))
+        
+        # as listagens são independentes; rodam em paralelo e o resultado é lido em ordem
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            listings = {parent: pool.submit(self._list_dir, parent) for parent in buckets}
+            checks = [(full_path, pool.submit(os.path.exists, full_path)) for full_path in fallback]
+            for parent, entries in buckets.items():
+                names = listings[parent].result()
+                for base, full_path in entries:
+                    if base in names:
+                        existing.add(full_path)
+                    elif self._CASE_INSENSITIVE_FS and os.path.exists(full_path):
+                        existing.add(full_path)
+            for full_path, found in checks:
+                if found.result():
+                    existing.add(full_path)
+        return existing
+    
     def execute_boot_sequence(self, callback=None):
         """Execute boot sequence with timeout and recovery"""
         self.log_boot("Starting BotCreator OS Boot Sequence v3.0...")
@@ -357,11 +607,19 @@ class BootSystem:
         sequence = config.get("sequence", {})
         settings = config.get("settings", {})
         
-        sorted_items = sorted(sequence.items(), key=lambda x: x[1].get("priority", 999))
+        sorted_items = self._sorted_sequence(sequence)
         
         success_count = 0
         total_count = len(sorted_items)
         
+        candidates = []
+        for _, item in sorted_items:
+            try:
+                candidates.append(self._full_path(item.get("path", "")))
+            except Exception:
+                pass  # reported again inside the loop below
+        existing = self._existing_paths(candidates)
+        
         for name, item in sorted_items:
             priority = item.get("priority", 0)
             path = item.get("path", "")
@@ -370,9 +628,9 @@ class BootSystem:
             self.log_boot(f"[{priority}] Loading {name}...")
             
             try:
-                full_path = os.path.join(self.root_dir, path) if not os.path.isabs(path) else path
+                full_path = self._full_path(path)
                 
-                if os.path.exists(full_path):
+                if full_path in existing:
                     self.log_boot(f"    ✓ {name} loaded successfully")
                     success_count += 1
                 else:
@@ -391,13 +649,14 @@ class BootSystem:
         self.log_boot("="*60)
         self.log_boot(f"Boot sequence completed: {success_count}/{total_count} items loaded")
         
-        if success_count >= (total_count * 0.7):  # Raised success threshold
+        ok = success_count >= (total_count * 0.7)  # Raised success threshold
+        if ok:
             self.boot_success = True
             self.log_boot("✓ BotCreator OS started successfully")
-            return True
         else:
             self.log_boot("✗ Boot sequence failed - insufficient components", "ERROR")
-            return False
+        self.flush_log()
+        return ok
     
     def attempt_recovery(self, name, path):
         """Attempt automatic recovery for critical components"""
@@ -425,28 +684,28 @@ class AIEngine:
             "unknown": ["Hmm, not sure about that one. Can you elaborate?", "Interesting! Tell me more.", "That's a new one for me."]
         }
         self.learned_responses = {}  # For dynamic learning
-        self.context_memory = []  # Conversation context
+        self.context_memory = deque(maxlen=10)  # Conversation context
+        # one pass classifies the message; the group name is the response category
+        self._re = re.compile(
+            r'\b(?P<greeting>hello|hi|hey)\b'
+            r'|\b(?P<goodbye>bye|goodbye|see you)\b'
+            r'|\b(?P<thanks>thank|thanks)\b'
+            r'|\b(?P<help>help|assist)\b',
+            re.I
+        )
     
     def generate_response(self, message, context="general"):
         """Generate AI response with context and learning"""
         self.context_memory.append(message)
-        if len(self.context_memory) > 10:
-            self.context_memory.pop(0)
-        
-        message_lower = message.lower()
-        
-        if any(word in message_lower for word in ["hello", "hi", "hey"]):
-            return self._get_response("greeting")
-        elif any(word in message_lower for word in ["bye", "goodbye", "see you"]):
-            return self._get_response("goodbye")
-        elif any(word in message_lower for word in ["thank", "thanks"]):
-            return self._get_response("thanks")
-        elif any(word in message_lower for word in ["help", "assist"]):
-            return self._get_response("help")
-        elif message_lower in self.learned_responses:
-            return self.learned_responses[message_lower]
-        else:
-            return self._get_response("unknown")
+        
+        m = self._re.search(message)
+        if m:
+            return self._get_response(m.lastgroup)
+        
+        learned = self.learned_responses.get(message.lower())
+        if learned is not None:
+            return learned
+        return self._get_response("unknown")
     
     def _get_response(self, category):
         responses = self.responses.get(category, ["I understand."])
@@ -460,6 +719,9 @@ class AIEngine:
 class DiscordBotCreator:
     """Enhanced Discord Bot Creator with more features"""
     
+    # placeholders do template; qualquer outro { } é código do bot gerado
+    _TEMPLATE_RE = re.compile(r'\$\{(token|prefix)\}')
+    
     def __init__(self, parent_app):
         self.parent = parent_app
         self.template = '''import discord
@@ -468,8 +730,8 @@ import asyncio
 import logging
 
 # Bot configuration
-BOT_TOKEN = "{token}"
-COMMAND_PREFIX = "{prefix}"
+BOT_TOKEN = "${token}"
+COMMAND_PREFIX = "${prefix}"
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -523,20 +785,21 @@ if __name__ == "__main__":
     
     def create_discord_bot(self, bot_name, prefix, token, features):
         """Create Discord bot with enhanced features"""
-        code = self.template.format(token=token, prefix=prefix)
+        mapping = {"token": token, "prefix": prefix}
+        pieces = [self._TEMPLATE_RE.sub(lambda m: mapping[m.group(1)], self.template)]
         
         if "moderation" in features:
-            code += self.get_moderation_commands()
+            pieces.append(self.get_moderation_commands())
         if "music" in features:
-            code += self.get_music_commands()
+            pieces.append(self.get_music_commands())
         if "ai_chat" in features:
-            code += self.get_ai_chat_commands()
+            pieces.append(self.get_ai_chat_commands())
         if "games" in features:
-            code += self.get_game_commands()
+            pieces.append(self.get_game_commands())
         if "utility" in features:
-            code += self.get_utility_commands()
+            pieces.append(self.get_utility_commands())
         
-        return code
+        return ''.join(pieces)
     
     def get_moderation_commands(self):
         return '''
@@ -678,7 +941,97 @@ async def remind(ctx, time: int, *, reminder: str):
     await ctx.send(f"{ctx.author.mention} Reminder: {reminder}")
 '''
 
+def _append_capped(widget, text, max_lines):
+    """Append text to a read-only textbox, dropping the oldest lines past max_lines"""
+    widget.configure(state="normal")
+    widget.insert(tk.END, text)
+    lines = int(widget.index("end-1c").split(".")[0])
+    if lines > max_lines:
+        widget.delete("1.0", f"{lines - max_lines + 1}.0")
+    widget.configure(state="disabled")
+    widget.see(tk.END)
+
 class BotCreatorOS:
+    # limite de linhas dos consoles de texto (boot e sudo)
+    MAX_CONSOLE_LINES = 2000
+    
+    # abas: nome -> (builder, updater que depende dos widgets da aba)
+    _TABS = {
+        "🤖 Dashboard": ("create_dashboard_tab", "update_dashboard"),
+        "🛠 Bot Creator": ("create_bot_creator_tab", None),
+        "💬 Discord": ("create_discord_tab", None),
+        "🧠 AI Lab": ("create_ai_lab_tab", None),
+        "💭 Chat": ("create_chat_tab", None),
+        "📂 Manager": ("create_manager_tab", "refresh_bot_list"),
+        "⚙ System": ("create_system_tab", "update_system_status"),
+        "🔒 Sudo": ("create_sudo_tab", None),
+    }
+    
+    # nomes usados em schedule_refresh -> updater
+    _REFRESHERS = {
+        "dashboard": "update_dashboard",
+        "system": "update_system_status",
+        "bots": "refresh_bot_list",
+    }
+    
+    # configs padrão criados em Services/ quando faltam
+    _DEFAULT_CONFIGS = {
+        "AI.conf": """# Enhanced AI Engine Configuration
+[AI]
+enabled=true
+model=advanced
+response_delay=500
+context_memory=20
+learning_rate=0.5
+
+[FEATURES]
+auto_responses=true
+learning=true
+personality=dynamic
+emotional_intelligence=true
+""",
+        "Discord.conf": """# Enhanced Discord Configuration
+[DISCORD]
+enabled=true
+default_prefix=!
+auto_start=false
+max_bots=10
+webhook_support=true
+
+[FEATURES]
+moderation=true
+music=true
+ai_integration=true
+custom_commands=true
+games=true
+utility=true
+""",
+        "Logging.conf": """# Logging Service Configuration
+[LOGGING]
+enabled=true
+level=INFO
+rotate_days=7
+max_size_mb=10
+
+[FEATURES]
+console_output=true
+file_output=true
+error_alerts=true
+""",
+        "Sudo.conf": """# Sudo System Configuration
+[SUDO]
+enabled=true
+session_timeout=300
+log_level=INFO
+
+[FEATURES]
+impersonation=true
+audit=true
+password_required=true
+""",
+    }
+    _DEFAULT_CONFIGS_BYTES = {name: text.encode('utf-8') for name, text in _DEFAULT_CONFIGS.items()}
+    
     def __init__(self):
         self.root_dir = os.path.dirname(os.path.abspath(__file__))
         self.boot_system = BootSystem(self.root_dir)
@@ -719,32 +1072,31 @@ class BotCreatorOS:
         self.user_store.ensure_user('bob')
         self.user_store.add_perm('bob', 'say')
         
-        # Register app-specific commands
-        registry.register('list_bots', self.cmd_list_bots, 'view')
-        registry.register('reload_bots', self.cmd_reload_bots, 'admin')
-        registry.register('whoami', cmd_whoami, None)
-        registry.register('grant', cmd_grant, 'admin')
-        registry.register('revoke', cmd_revoke, 'admin')
-        registry.register('say', cmd_say, 'say')
-        registry.register('echo', cmd_echo, None)
-        registry.register('list_users', cmd_list_users, 'admin')
-        registry.register('list_perms', cmd_list_perms, 'admin')
-        registry.register('create_user', cmd_create_user, 'admin')
-        registry.register('change_password', cmd_change_password, 'admin')
-        registry.register('add_perm', cmd_add_perm, 'admin')
-        registry.register('remove_perm', cmd_remove_perm, 'admin')
-        registry.register('list_commands', cmd_list_commands, None)
+        # Register app-specific commands (the module-level ones register via @command)
+        app_cmds = [
+            ('list_bots', self.cmd_list_bots, 'view'),
+            ('reload_bots', self.cmd_reload_bots, 'admin'),
+        ]
+        for name, fn, perm in app_cmds:
+            registry.register(name, fn, perm)
         
         self.current_user = None
+        self._refresh_pending = set()
+        # True enquanto load_all_bots roda na thread de _deferred_startup
+        self._bots_loading = False
         
         self.setup_directories()
         self.create_default_files()
         self.init_gui()
     
     def cmd_list_bots(self, ctx: Context):
+        if self._bots_loading:
+            return "bots are still loading, try again shortly"
         return ', '.join(self.loaded_bots.keys())
     
     def cmd_reload_bots(self, ctx: Context):
+        if self._bots_loading:
+            return "bots are still loading, try again shortly"
         self.reload_all_bots()
         return "Bots reloaded successfully"
     
@@ -762,82 +1114,45 @@ class BotCreatorOS:
         """Create default files with enhancements"""
         self.boot_system.ensure_boot_files()
         
-        # Enhanced AI config
-        ai_config_path = os.path.join(self.services_dir, "AI.conf")
-        if not os.path.exists(ai_config_path):
-            ai_config = """# Enhanced AI Engine Configuration
-[AI]
-enabled=true
-model=advanced
-response_delay=500
-context_memory=20
-learning_rate=0.5
-
-[FEATURES]
-auto_responses=true
-learning=true
-personality=dynamic
-emotional_intelligence=true
-"""
-            with open(ai_config_path, 'w') as f:
-                f.write(ai_config)
-        
-        # Enhanced Discord config
-        discord_config_path = os.path.join(self.services_dir, "Discord.conf")
-        if not os.path.exists(discord_config_path):
-            discord_config = """# Enhanced Discord Configuration
-[DISCORD]
-enabled=true
-default_prefix=!
-auto_start=false
-max_bots=10
-webhook_support=true
-
-[FEATURES]
-moderation=true
-music=true
-ai_integration=true
-custom_commands=true
-games=true
-utility=true
-"""
-            with open(discord_config_path, 'w') as f:
-                f.write(discord_config)
-        
-        # New Logging config
-        logging_config_path = os.path.join(self.services_dir, "Logging.conf")
-        if not os.path.exists(logging_config_path):
-            logging_config = """# Logging Service Configuration
-[LOGGING]
-enabled=true
-level=INFO
-rotate_days=7
-max_size_mb=10
-
-[FEATURES]
-console_output=true
-file_output=true
-error_alerts=true
-"""
-            with open(logging_config_path, 'w') as f:
-                f.write(logging_config)
-        
-        # New Sudo config
-        sudo_config_path = os.path.join(self.services_dir, "Sudo.conf")
-        if not os.path.exists(sudo_config_path):
-            sudo_config = """# Sudo System Configuration
-[SUDO]
-enabled=true
-session_timeout=300
-log_level=INFO
-
-[FEATURES]
-impersonation=true
-audit=true
-password_required=true
-"""
-            with open(sudo_config_path, 'w') as f:
-                f.write(sudo_config)
+        # configs que faltam; uma listagem do diretório no lugar de um stat por arquivo
+        try:
+            with os.scandir(self.services_dir) as it:
+                existing = {e.name for e in it}
+        except OSError:
+            existing = set()
+        pending = [(name, data) for name, data in self._DEFAULT_CONFIGS_BYTES.items()
+                   if name not in existing]
+        self._write_configs_batch(pending)
+    
+    def _write_configs_batch(self, pending):
+        """Write the missing default configs, one file per service"""
+        if not pending:
+            return
+        
+        # com 2+ arquivos, resolve Services/ uma vez e abre cada um relativo ao dirfd
+        if len(pending) >= 2 and os.open in os.supports_dir_fd:
+            dirfd = os.open(self.services_dir, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+            try:
+                for name, data in pending:
+                    self._write_config(name, data, dirfd)
+            finally:
+                os.close(dirfd)
+            return
+        
+        for name, data in pending:
+            self._write_config(os.path.join(self.services_dir, name), data)
+    
+    def _write_config(self, path, data, dir_fd=None):
+        # O_EXCL: se o arquivo já existe (criado por outro processo), não sobrescreve
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+        try:
+            fd = os.open(path, flags, 0o644, dir_fd=dir_fd)
+        except FileExistsError:
+            return
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
     
     def show_boot_sequence(self):
         """Show boot sequence with enhanced UI"""
@@ -850,14 +1165,15 @@ password_required=true
         title_label = customtkinter.CTkLabel(
             boot_window,
             text="🚀 BotCreator OS v3 Starting...",
-            font=customtkinter.CTkFont(size=24, weight="bold")
+            font=self.fonts["h24b"]
         )
         title_label.pack(pady=20)
         
         console_frame = customtkinter.CTkFrame(boot_window)
         console_frame.pack(fill="both", expand=True, padx=20, pady=10)
         
-        console_text = customtkinter.CTkTextbox(console_frame, font=("Consolas", 12))
+        console_text = customtkinter.CTkTextbox(console_frame, font=self.fonts["mono12"], state="disabled",
+                                                undo=False, autoseparators=False)
         console_text.pack(fill="both", expand=True, padx=10, pady=10)
         
         progress_label = customtkinter.CTkLabel(boot_window, text="Initializing System...")
@@ -867,14 +1183,22 @@ password_required=true
         progress_bar.pack(fill="x", padx=20, pady=(0, 20))
         progress_bar.set(0)
         
+        # linhas do boot_log já mostradas no console
+        lines_written = 0
+        
         def update_console(name, priority, current, total):
             progress = current / total
             progress_bar.set(progress)
             progress_label.configure(text=f"Loading {name} ({current}/{total})")
-            console_text.delete("1.0", tk.END)
-            console_text.insert("1.0", "\n".join(self.boot_system.boot_log))
-            console_text.see(tk.END)
-            boot_window.update()
+            append_new_lines()
+        
+        def append_new_lines():
+            nonlocal lines_written
+            if len(self.boot_system.boot_log) == lines_written:
+                return  # nada novo desde o último tick
+            new = self.boot_system.boot_log[lines_written:]
+            _append_capped(console_text, "\n".join(new) + "\n", self.MAX_CONSOLE_LINES)
+            lines_written += len(new)
         
         def complete_boot():
             if self.boot_system.boot_success:
@@ -885,14 +1209,68 @@ password_required=true
                 messagebox.showwarning("Boot Warning", "Some components were recovered automatically.")
             
             self.boot_successful = True
-            self.update_dashboard()
-            self.update_system_status()
+            self.schedule_refresh("dashboard", "system")
             boot_window.destroy()
         
-        threading.Thread(target=lambda: [self.boot_system.execute_boot_sequence(update_console), boot_window.after(500, complete_boot)]).start()
+        # o worker só enfileira progresso; a thread principal aplica no Tk.
+        # cada boot tem sua própria fila, então um boot antigo não encerra o novo
+        updates = queue.Queue()
+        
+        def pump():
+            latest, done = None, False
+            while True:
+                try:
+                    state = updates.get_nowait()
+                except queue.Empty:
+                    break
+                if state == ("__done__",):
+                    done = True
+                    break
+                latest = state
+            if latest is not None:
+                update_console(*latest)
+            if done:
+                append_new_lines()  # linhas finais do boot, depois do último callback
+                self.window.after(500, complete_boot)
+            else:
+                boot_window.after(33, pump)
+        
+        threading.Thread(target=self._run_boot, args=(updates,), daemon=True).start()
+        boot_window.after(33, pump)
+    
+    def schedule_refresh(self, *names):
+        """Queue UI refreshes; each one runs at most once on the next idle pass"""
+        if not self._refresh_pending:
+            self.window.after_idle(self._do_refresh)
+        self._refresh_pending.update(names)
+    
+    def _do_refresh(self):
+        pending, self._refresh_pending = self._refresh_pending, set()
+        wanted = {self._REFRESHERS[name] for name in pending}
+        for tab, (_, updater) in self._TABS.items():
+            # aba ainda não montada: o updater roda quando ela for aberta
+            if updater in wanted and tab not in self._tab_builders and not self._waits_for_bots(updater):
+                getattr(self, updater)()
+    
+    def _waits_for_bots(self, updater):
+        # dashboard e lista de bots leem loaded_bots; o fim do load agenda os dois de novo
+        return self._bots_loading and updater in ("update_dashboard", "refresh_bot_list")
+    
+    def _run_boot(self, updates):
+        """Boot worker thread: runs the sequence without touching Tk"""
+        try:
+            self.boot_system.execute_boot_sequence(lambda *state: updates.put(state))
+        finally:
+            updates.put(("__done__",))
     
     def init_gui(self):
         """Initialize enhanced GUI with better theme and layout"""
+        # GUI imports ficam aqui: uso via CLI/dispatcher não paga o custo do Tk
+        global customtkinter, tk, filedialog, messagebox, scrolledtext
+        import customtkinter
+        import tkinter as tk
+        from tkinter import filedialog, messagebox, scrolledtext
+        
         customtkinter.set_appearance_mode("dark")
         customtkinter.set_default_color_theme("dark-blue")
         
@@ -900,6 +1278,16 @@ password_required=true
         self.window.title("BotCreator OS v3.0 - Enhanced Bot Development Platform")
         self.window.geometry("1600x1000")
         
+        # fontes compartilhadas; CTkFont precisa da janela raiz já criada
+        self.fonts = {
+            "title32": customtkinter.CTkFont(size=32, weight="bold"),
+            "title26": customtkinter.CTkFont(size=26, weight="bold"),
+            "h24b": customtkinter.CTkFont(size=24, weight="bold"),
+            "h16b": customtkinter.CTkFont(size=16, weight="bold"),
+            "h16": customtkinter.CTkFont(size=16),
+            "mono12": ("Consolas", 12),
+        }
+        
         # Enhanced header with more elements
         header_frame = customtkinter.CTkFrame(self.window, height=90)
         header_frame.pack(fill="x", padx=10, pady=(10, 0))
@@ -908,14 +1296,14 @@ password_required=true
         title_label = customtkinter.CTkLabel(
             header_frame,
             text="🤖 BotCreator OS v3",
-            font=customtkinter.CTkFont(size=32, weight="bold")
+            font=self.fonts["title32"]
         )
         title_label.pack(side="left", padx=20, pady=20)
         
         self.boot_status = customtkinter.CTkLabel(
             header_frame,
             text="⚠ Boot Required",
-            font=customtkinter.CTkFont(size=16),
+            font=self.fonts["h16"],
             text_color="orange"
         )
         self.boot_status.pack(side="right", padx=20, pady=20)
@@ -925,30 +1313,42 @@ password_required=true
             text="🚀 Launch OS",
             command=self.show_boot_sequence,
             height=50,
-            font=customtkinter.CTkFont(size=16, weight="bold")
+            font=self.fonts["h16b"]
         )
         boot_btn.pack(side="right", padx=(0, 10), pady=20)
         
-        self.tabview = customtkinter.CTkTabview(self.window)
+        self.tabview = customtkinter.CTkTabview(self.window, command=self._on_tab_changed)
         self.tabview.pack(fill="both", expand=True, padx=10, pady=10)
         
-        self.create_dashboard_tab()
-        self.create_bot_creator_tab()
-        self.create_discord_tab()
-        self.create_ai_lab_tab()
-        self.create_chat_tab()
-        self.create_manager_tab()
-        self.create_system_tab()
-        self.create_sudo_tab()
+        # abas vazias; o conteúdo é montado na primeira vez que a aba é aberta
+        self._tab_builders = dict(self._TABS)
+        for name in self._tab_builders:
+            self.tabview.add(name)
+        self._on_tab_changed()
+    
+    def _ensure_tab(self, name):
+        """Build a tab's content if it has not been built yet"""
+        entry = self._tab_builders.pop(name, None)
+        if entry is None:
+            return
+        builder, updater = entry
+        # a aba já foi criada em init_gui; o builder pega o frame com tabview.tab(name)
+        getattr(self, builder)()
+        # a aba perdeu os refreshes enquanto não existia; sincroniza uma vez
+        if updater and not self._waits_for_bots(updater):
+            getattr(self, updater)()
+    
+    def _on_tab_changed(self):
+        self._ensure_tab(self.tabview.get())
     
     def create_sudo_tab(self):
         """New Sudo Console Tab"""
-        self.sudo_tab = self.tabview.add("🔒 Sudo")
+        self.sudo_tab = self.tabview.tab("🔒 Sudo")
         
         header_label = customtkinter.CTkLabel(
             self.sudo_tab,
             text="🔒 Sudo Command Console",
-            font=customtkinter.CTkFont(size=26, weight="bold")
+            font=self.fonts["title26"]
         )
         header_label.pack(pady=20)
         
@@ -981,7 +1381,8 @@ password_required=true
         exec_btn = customtkinter.CTkButton(cmd_frame, text="▶ Execute", command=self.sudo_execute)
         exec_btn.pack(pady=10)
         
-        self.sudo_output = customtkinter.CTkTextbox(cmd_frame, font=("Consolas", 12))
+        self.sudo_output = customtkinter.CTkTextbox(cmd_frame, font=self.fonts["mono12"], state="disabled",
+                                                    undo=False, autoseparators=False)
         self.sudo_output.pack(fill="both", expand=True)
     
     def sudo_login(self):
@@ -1005,18 +1406,37 @@ password_required=true
             return
         
         output = self.dispatcher.run(self.current_user, command)
-        self.sudo_output.insert(tk.END, f"> {command}\n{output}\n\n")
-        self.sudo_output.see(tk.END)
+        _append_capped(self.sudo_output, f"> {command}\n{output}\n\n", self.MAX_CONSOLE_LINES)
         self.sudo_command.delete(0, tk.END)
     
     # Rest of the class remains the same, with possible integrations in other methods
     
     def run(self):
         logging.info("Starting BotCreator OS v3")
-        self.load_all_bots()
-        self.update_dashboard()
-        self.refresh_bot_list()
+        self.window.after(0, self._deferred_startup)
         self.window.mainloop()
+    
+    def _deferred_startup(self):
+        """Load bots in the background once the window is on screen"""
+        spinner = customtkinter.CTkProgressBar(self.tabview.tab("🤖 Dashboard"), mode="indeterminate")
+        spinner.pack(fill="x", padx=20, pady=10)
+        spinner.start()
+        
+        # até poll() ver o fim do load, nada na thread principal lê loaded_bots
+        self._bots_loading = True
+        loader = threading.Thread(target=self.load_all_bots, daemon=True)
+        loader.start()
+        
+        def poll():
+            if loader.is_alive():
+                self.window.after(50, poll)
+                return
+            self._bots_loading = False
+            spinner.stop()
+            spinner.destroy()
+            self.schedule_refresh("dashboard", "bots")
+        
+        self.window.after(50, poll)
 
 # Main
 if __name__ == "__main__":